@@ -1,25 +1,56 @@
 from fastapi import FastAPI, File, UploadFile, HTTPException, Form
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, Response
 from fastapi.staticfiles import StaticFiles
 import os
 import shutil
-import json
+import orjson
+import asyncio
+import re
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 import logging
-from urllib.parse import urlparse
+import multiprocessing
+from urllib.parse import urlparse, quote
+from functools import lru_cache
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 import uuid
 
 # Import our PDF parser
-from pdf_parser import process_pdf_file
+from pdf_parser import process_pdf_file, page_data_dir, page_data_path
 from youtube_transcript import extract_youtube_transcript
+from utils import write_json_atomic, write_all
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Vibe Learning Content API", version="1.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    On startup, size the default thread pool used by asyncio.to_thread for
+    blocking work, start the process pool used for PDF parsing and populate
+    PDF_INDEX from the files already in UPLOAD_DIR; on shutdown, stop the PDF
+    parsing worker processes
+    """
+    global PDF_POOL
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=BLOCKING_IO_WORKERS))
+    PDF_POOL = ProcessPoolExecutor(max_workers=PDF_WORKERS, mp_context=PDF_POOL_CONTEXT)
+    try:
+        with os.scandir(UPLOAD_DIR) as entries:
+            for entry in entries:
+                if entry.is_file() and entry.name.endswith(".pdf") and "_" in entry.name:
+                    content_id = entry.name.split("_", 1)[0]
+                    PDF_INDEX[content_id] = Path(entry.path)
+        logger.info(f"Indexed {len(PDF_INDEX)} uploaded PDF files")
+        
+        yield
+    finally:
+        PDF_POOL.shutdown(cancel_futures=True)
+
+app = FastAPI(title="Vibe Learning Content API", version="1.0.0", lifespan=lifespan)
 
 # Configure CORS
 app.add_middleware(
@@ -39,12 +70,120 @@ UPLOAD_DIR.mkdir(exist_ok=True)
 DATA_DIR.mkdir(exist_ok=True)
 IMAGES_DIR.mkdir(exist_ok=True)
 
+# Hosts accepted by the YouTube transcript endpoint
+YOUTUBE_HOSTS = frozenset({"youtube.com", "www.youtube.com", "m.youtube.com", "youtu.be"})
+
+# Content IDs the API generates: uuid4().hex, or str(uuid4()) for older uploads
+CONTENT_ID_RE = re.compile(r"[0-9a-f]{32}|[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}")
+
+# Runs of whitespace collapsed to a single space in transcripts
+WHITESPACE_RE = re.compile(r"\s+")
+
+# Worker threads for blocking calls (transcript fetches, file deletes)
+BLOCKING_IO_WORKERS = 32
+
+# Worker processes for CPU-bound PDF parsing; the semaphore caps in-flight jobs to bound memory
+PDF_WORKERS = os.cpu_count() or 1
+# Workers are started from a clean server process, not forked from this one,
+# which by then runs other threads whose held locks a forked child would inherit
+PDF_POOL_CONTEXT = multiprocessing.get_context(
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+PDF_POOL: Optional[ProcessPoolExecutor] = None
+PDF_SEMAPHORE = asyncio.Semaphore(PDF_WORKERS)
+
+# Upload limits
+MAX_UPLOAD_SIZE = 50 * 1024 * 1024  # 50MB
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 1MB per read/write
+
+# When set (e.g. "/_protected_uploads/"), PDFs are handed off to nginx via
+# X-Accel-Redirect instead of being streamed through Python
+PDF_ACCEL_REDIRECT_PREFIX = os.getenv("PDF_ACCEL_REDIRECT_PREFIX")
+
+def validate_content_id(content_id: str) -> None:
+    """
+    Reject anything that isn't a generated content ID before it is used to build paths
+    """
+    if not CONTENT_ID_RE.fullmatch(content_id):
+        raise HTTPException(status_code=400, detail="Invalid content ID")
+
+# content_id -> uploaded PDF path, so lookups don't rescan UPLOAD_DIR
+PDF_INDEX: Dict[str, Path] = {}
+
+
+def find_pdf_file(content_id: str) -> Optional[Path]:
+    """
+    Look up the uploaded PDF for a content ID, falling back to a directory scan on a miss
+    """
+    pdf_file = PDF_INDEX.get(content_id)
+    if pdf_file is None:
+        prefix = f"{content_id}_"
+        with os.scandir(UPLOAD_DIR) as entries:
+            pdf_files = [entry.path for entry in entries
+                         if entry.name.startswith(prefix) and entry.name.endswith(".pdf")]
+        if not pdf_files:
+            return None
+        pdf_file = PDF_INDEX[content_id] = Path(pdf_files[0])
+    return pdf_file
+
+@lru_cache(maxsize=256)
+def _load_json(path: str, mtime_ns: int) -> Any:
+    with open(path, 'rb') as f:
+        return orjson.loads(f.read())
+
+
+def load_json_file(json_file_path: Path) -> Any:
+    """
+    Load a data JSON file, serving repeat reads from memory until the file changes.
+    The returned object is shared between requests and must not be mutated.
+    """
+    return _load_json(str(json_file_path), json_file_path.stat().st_mtime_ns)
+
+def _remove_file(path: Path) -> bool:
+    """
+    Delete a file, returning False if it did not exist
+    """
+    try:
+        path.unlink()
+        return True
+    except FileNotFoundError:
+        return False
+
+def _remove_tree(path: Path) -> bool:
+    """
+    Delete a directory tree, returning False if it did not exist
+    """
+    try:
+        shutil.rmtree(path)
+        return True
+    except FileNotFoundError:
+        return False
+
 # Mount static files for serving uploads and images
 app.mount("/uploads", StaticFiles(directory=UPLOAD_DIR), name="uploads")
 app.mount("/images", StaticFiles(directory=IMAGES_DIR), name="images")
 
 
 
+async def run_pdf_job(*args) -> Dict[str, Any]:
+    """
+    Run process_pdf_file in the PDF pool. If a worker process died, the broken
+    pool (which rejects every later submission) is replaced for later uploads
+    and BrokenProcessPool is re-raised; the job is not retried, since the PDF
+    that killed the worker would likely kill the new pool too.
+    """
+    global PDF_POOL
+    pool = PDF_POOL
+    try:
+        return await asyncio.get_running_loop().run_in_executor(pool, process_pdf_file, *args)
+    except BrokenProcessPool:
+        # Another request may already have replaced the broken pool
+        if PDF_POOL is pool:
+            logger.error("PDF worker process died; restarting the PDF pool")
+            pool.shutdown(wait=False, cancel_futures=True)
+            PDF_POOL = ProcessPoolExecutor(max_workers=PDF_WORKERS, mp_context=PDF_POOL_CONTEXT)
+        raise
+
 @app.get("/")
 async def root():
     return {"message": "Vibe Learning Content API is running!"}
@@ -71,8 +210,7 @@ async def upload_content(
             raise HTTPException(status_code=400, detail="Invalid URL format")
         
         # Generate unique content ID
-        import uuid
-        content_id = str(uuid.uuid4())
+        content_id = uuid.uuid4().hex
         
         # Create mock response without processing
         content_data = {
@@ -109,41 +247,52 @@ async def upload_pdf(file: UploadFile = File(...)) -> Dict[str, Any]:
         if not file.filename or not file.filename.lower().endswith('.pdf'):
             raise HTTPException(status_code=400, detail="Only PDF files are allowed")
         
-        # Validate file size (50MB limit)
-        file_size = 0
-        file.file.seek(0, 2)  # Seek to end
-        file_size = file.file.tell()
-        file.file.seek(0)  # Reset to beginning
-        
-        if file_size > 50 * 1024 * 1024:  # 50MB in bytes
+        # Reject early when the multipart parser already knows the size
+        if file.size is not None and file.size > MAX_UPLOAD_SIZE:
             raise HTTPException(status_code=400, detail="File size exceeds 50MB limit")
         
         # Generate unique filename
-        file_id = str(uuid.uuid4())
+        file_id = uuid.uuid4().hex
         file_path = UPLOAD_DIR / f"{file_id}_{file.filename}"
         
-        # Save file
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        # Save file in large chunks straight to the fd (no BufferedWriter),
+        # enforcing the 50MB limit as we stream
+        file_size = 0
+        fd = os.open(file_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | os.O_CLOEXEC, 0o644)
+        try:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                file_size += len(chunk)
+                if file_size > MAX_UPLOAD_SIZE:
+                    break
+                await asyncio.to_thread(write_all, fd, chunk)
+        finally:
+            os.close(fd)
+        
+        if file_size > MAX_UPLOAD_SIZE:
+            file_path.unlink(missing_ok=True)
+            raise HTTPException(status_code=400, detail="File size exceeds 50MB limit")
         
+        PDF_INDEX[file_id] = file_path
         logger.info(f"Saved PDF file: {file_path}")
         
         # Process the PDF file
         try:
-            processed_data = process_pdf_file(file_path, file_id, image_dir=IMAGES_DIR, data_dir=DATA_DIR)
+            async with PDF_SEMAPHORE:
+                processed_data = await run_pdf_job(file_path, file_id, IMAGES_DIR, DATA_DIR)
             
             # Create summary response
+            first_page_text = processed_data["pages"][0]["text"] if processed_data["pages"] else ""
             file_info = {
                 "content_id": file_id,
                 "content_type": "pdf-file", 
                 "title": file.filename,
                 "file_size": file_size,
                 "total_pages": processed_data["total_pages"],
-                "total_text_length": sum(page["text_length"] for page in processed_data["pages"]),
-                "total_images": sum(page["image_count"] for page in processed_data["pages"]),
-                "text_preview": (processed_data["pages"][0]["text"][:200] + "..." 
-                               if processed_data["pages"] and len(processed_data["pages"][0]["text"]) > 200
-                               else processed_data["pages"][0]["text"] if processed_data["pages"] else ""),
+                "total_text_length": processed_data["total_text_length"],
+                "total_images": processed_data["total_images"],
+                "text_preview": (first_page_text[:200] + "..." 
+                               if len(first_page_text) > 200
+                               else first_page_text),
                 "status": "processed",
                 "processed_at": processed_data["processed_at"],
                 "data_file": f"data/{file_id}.json"
@@ -151,8 +300,8 @@ async def upload_pdf(file: UploadFile = File(...)) -> Dict[str, Any]:
             
             logger.info(f"Successfully processed PDF: {file.filename} (ID: {file_id}) - "
                        f"{processed_data['total_pages']} pages, "
-                       f"{sum(page['text_length'] for page in processed_data['pages'])} chars, "
-                       f"{sum(page['image_count'] for page in processed_data['pages'])} images")
+                       f"{processed_data['total_text_length']} chars, "
+                       f"{processed_data['total_images']} images")
             
             return {
                 "success": True,
@@ -160,6 +309,19 @@ async def upload_pdf(file: UploadFile = File(...)) -> Dict[str, Any]:
                 "data": file_info
             }
             
+        except BrokenProcessPool:
+            logger.error(f"PDF worker died while processing {file.filename} (ID: {file_id})")
+            
+            # Drop the upload and anything the worker wrote before it died
+            PDF_INDEX.pop(file_id, None)
+            for path, remove in ((file_path, _remove_file), (IMAGES_DIR / file_id, _remove_tree),
+                                 (page_data_dir(DATA_DIR, file_id), _remove_tree)):
+                try:
+                    remove(path)
+                except Exception as cleanup_error:
+                    logger.error(f"Failed to clean up {path}: {str(cleanup_error)}")
+            
+            raise HTTPException(status_code=503, detail="PDF processing failed; please try again")
         except ValueError as char_limit_error:
             # Handle character limit exceeded error specifically
             logger.warning(f"Character limit exceeded for PDF: {file.filename} - {str(char_limit_error)}")
@@ -168,9 +330,9 @@ async def upload_pdf(file: UploadFile = File(...)) -> Dict[str, Any]:
             cleanup_items = []
             
             # Clean up the uploaded PDF file
+            PDF_INDEX.pop(file_id, None)
             try:
-                if file_path.exists():
-                    file_path.unlink()
+                if _remove_file(file_path):
                     cleanup_items.append(f"PDF file: {file_path.name}")
             except Exception as cleanup_error:
                 logger.error(f"Failed to clean up PDF file {file_path}: {str(cleanup_error)}")
@@ -178,8 +340,7 @@ async def upload_pdf(file: UploadFile = File(...)) -> Dict[str, Any]:
             # Clean up JSON data file if it exists
             try:
                 json_file_path = DATA_DIR / f"{file_id}.json"
-                if json_file_path.exists():
-                    json_file_path.unlink()
+                if _remove_file(json_file_path):
                     cleanup_items.append(f"Data file: {json_file_path.name}")
             except Exception as cleanup_error:
                 logger.error(f"Failed to clean up JSON file: {str(cleanup_error)}")
@@ -187,8 +348,7 @@ async def upload_pdf(file: UploadFile = File(...)) -> Dict[str, Any]:
             # Clean up extracted images directory if it exists
             try:
                 image_dir_path = IMAGES_DIR / file_id
-                if image_dir_path.exists():
-                    shutil.rmtree(image_dir_path)
+                if _remove_tree(image_dir_path):
                     cleanup_items.append(f"Images directory: {image_dir_path.name}")
             except Exception as cleanup_error:
                 logger.error(f"Failed to clean up images directory: {str(cleanup_error)}")
@@ -222,6 +382,8 @@ async def upload_pdf(file: UploadFile = File(...)) -> Dict[str, Any]:
                 "data": file_info
             }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error uploading PDF: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error uploading PDF: {str(e)}")
@@ -238,14 +400,18 @@ async def get_youtube_transcript(
         if not url or not isinstance(url, str):
             raise HTTPException(status_code=400, detail="URL is required")
         
-        # Check if it's a valid YouTube URL pattern
-        if "youtube.com" not in url and "youtu.be" not in url:
+        # Check if it's a valid YouTube URL (exact host match, not a substring)
+        try:
+            hostname = urlparse(url if "://" in url else f"//{url}").hostname
+        except ValueError:  # Malformed netloc, e.g. an unclosed IPv6 bracket
+            raise HTTPException(status_code=400, detail="Invalid YouTube URL")
+        if hostname not in YOUTUBE_HOSTS:
             raise HTTPException(status_code=400, detail="Invalid YouTube URL")
         
         logger.info(f"Extracting transcript for YouTube URL: {url}")
         
         # Extract transcript using the existing function
-        transcript_text = extract_youtube_transcript(url)
+        transcript_text = await asyncio.to_thread(extract_youtube_transcript, url)
         
         if not transcript_text:
             raise HTTPException(
@@ -254,10 +420,13 @@ async def get_youtube_transcript(
             )
         
         # Clean up the transcript (remove extra whitespace)
-        transcript_text = " ".join(transcript_text.split())
+        transcript_text = WHITESPACE_RE.sub(" ", transcript_text).strip()
         
         # Generate unique content ID
-        content_id = str(uuid.uuid4())
+        content_id = uuid.uuid4().hex
+        
+        text_length = len(transcript_text)
+        text_preview = transcript_text[:200] + "..." if text_length > 200 else transcript_text
         
         # Create content data structure similar to PDF processing
         content_data = {
@@ -265,10 +434,8 @@ async def get_youtube_transcript(
             "content_type": "youtube",
             "title": f"YouTube Video Transcript",
             "url": url,
-            "text_length": len(transcript_text),
-            "text_preview": (transcript_text[:200] + "..." 
-                           if len(transcript_text) > 200 
-                           else transcript_text),
+            "text_length": text_length,
+            "text_preview": text_preview,
             "status": "processed",
             "transcript": transcript_text,
             "processed_at": __import__('datetime').datetime.now().isoformat()
@@ -276,11 +443,10 @@ async def get_youtube_transcript(
         
         # Save transcript data to JSON file
         json_file_path = DATA_DIR / f"{content_id}.json"
-        with open(json_file_path, 'w', encoding='utf-8') as f:
-            json.dump(content_data, f, ensure_ascii=False, indent=2)
+        write_json_atomic(json_file_path, content_data, option=orjson.OPT_INDENT_2)
         
         logger.info(f"Successfully extracted YouTube transcript: {url} (ID: {content_id}) - "
-                   f"{len(transcript_text)} characters")
+                   f"{text_length} characters")
         
         return {
             "success": True,
@@ -290,8 +456,8 @@ async def get_youtube_transcript(
                 "content_type": "youtube",
                 "title": content_data["title"],
                 "url": url,
-                "text_length": len(transcript_text),
-                "text_preview": content_data["text_preview"],
+                "text_length": text_length,
+                "text_preview": text_preview,
                 "status": "processed",
                 "data_file": f"data/{content_id}.json"
             }
@@ -325,53 +491,54 @@ async def get_youtube_transcript(
             )
 
 @app.get("/content/{content_id}")
-async def get_content_info(content_id: str):
+async def get_content_info(content_id: str) -> Dict[str, Any]:
     """
     Get information about uploaded content
     """
     try:
-        # Check if JSON data file exists
-        json_file_path = DATA_DIR / f"{content_id}.json"
-        if not json_file_path.exists():
-            raise HTTPException(status_code=404, detail="Content not found")
+        validate_content_id(content_id)
         
-        # Load and return the processed data
-        with open(json_file_path, 'r', encoding='utf-8') as f:
-            content_data = json.load(f)
+        # Load and return the processed data (a missing file surfaces as FileNotFoundError)
+        json_file_path = DATA_DIR / f"{content_id}.json"
+        content_data = load_json_file(json_file_path)
         
         return {
             "success": True,
             "data": content_data
         }
         
+    except HTTPException:
+        raise
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Content not found")
-    except json.JSONDecodeError:
+    except orjson.JSONDecodeError:
         raise HTTPException(status_code=500, detail="Invalid data file format")
     except Exception as e:
         logger.error(f"Error retrieving content {content_id}: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error retrieving content: {str(e)}")
 
 @app.get("/content/{content_id}/page/{page_number}")
-async def get_page_content(content_id: str, page_number: int):
+async def get_page_content(content_id: str, page_number: int) -> Dict[str, Any]:
     """
     Get content for a specific page
     """
     try:
-        # Load the processed data
-        json_file_path = DATA_DIR / f"{content_id}.json"
-        if not json_file_path.exists():
-            raise HTTPException(status_code=404, detail="Content not found")
-        
-        with open(json_file_path, 'r', encoding='utf-8') as f:
-            content_data = json.load(f)
+        validate_content_id(content_id)
         
-        # Find the requested page
+        # Read just the requested page's shard when one was written at ingest
         page_data = None
-        for page in content_data.get("pages", []):
-            if page.get("page_number") == page_number:
-                page_data = page
-                break
+        try:
+            page_data = load_json_file(page_data_path(DATA_DIR, content_id, page_number))
+        except FileNotFoundError:
+            # Fall back to scanning the full document (older uploads have no shards)
+            json_file_path = DATA_DIR / f"{content_id}.json"
+            content_data = load_json_file(json_file_path)
+            
+            # Find the requested page
+            for page in content_data.get("pages", []):
+                if page.get("page_number") == page_number:
+                    page_data = page
+                    break
         
         if not page_data:
             raise HTTPException(status_code=404, detail=f"Page {page_number} not found")
@@ -381,47 +548,63 @@ async def get_page_content(content_id: str, page_number: int):
             "data": page_data
         }
         
+    except HTTPException:
+        raise
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Content not found")
-    except json.JSONDecodeError:
+    except orjson.JSONDecodeError:
         raise HTTPException(status_code=500, detail="Invalid data file format")
     except Exception as e:
         logger.error(f"Error retrieving page {page_number} from content {content_id}: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error retrieving page content: {str(e)}")
 
+def _page_summary(page: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build a pages_summary entry for documents processed before it was stored at ingest
+    """
+    text_preview = page.get("text_preview")
+    if text_preview is None:
+        text = page.get("text", "")
+        text_preview = text[:100] + "..." if len(text) > 100 else text
+    return {
+        "page_number": page.get("page_number"),
+        "text_length": page.get("text_length", 0),
+        "image_count": page.get("image_count", 0),
+        "text_preview": text_preview
+    }
+
 @app.get("/content/{content_id}/summary")
-async def get_content_summary(content_id: str):
+async def get_content_summary(content_id: str) -> Dict[str, Any]:
     """
     Get summary information about the content
     """
     try:
+        validate_content_id(content_id)
+        
         # Load the processed data
         json_file_path = DATA_DIR / f"{content_id}.json"
-        if not json_file_path.exists():
-            raise HTTPException(status_code=404, detail="Content not found")
-        
-        with open(json_file_path, 'r', encoding='utf-8') as f:
-            content_data = json.load(f)
+        content_data = load_json_file(json_file_path)
+        
+        # Create summary (aggregates are precomputed at ingest; recompute for older files)
+        pages = content_data.get("pages", [])
+        total_text_length = content_data.get("total_text_length")
+        if total_text_length is None:
+            total_text_length = sum(page.get("text_length", 0) for page in pages)
+        total_images = content_data.get("total_images")
+        if total_images is None:
+            total_images = sum(page.get("image_count", 0) for page in pages)
+        pages_summary = content_data.get("pages_summary")
+        if pages_summary is None:
+            pages_summary = [_page_summary(page) for page in pages]
         
-        # Create summary
         summary = {
             "content_id": content_data.get("content_id"),
             "total_pages": content_data.get("total_pages", 0),
             "processed_at": content_data.get("processed_at"),
             "pdf_info": content_data.get("pdf_info", {}),
-            "total_text_length": sum(page.get("text_length", 0) for page in content_data.get("pages", [])),
-            "total_images": sum(page.get("image_count", 0) for page in content_data.get("pages", [])),
-            "pages_summary": [
-                {
-                    "page_number": page.get("page_number"),
-                    "text_length": page.get("text_length", 0),
-                    "image_count": page.get("image_count", 0),
-                    "text_preview": (page.get("text", "")[:100] + "..." 
-                                   if len(page.get("text", "")) > 100 
-                                   else page.get("text", ""))
-                }
-                for page in content_data.get("pages", [])
-            ]
+            "total_text_length": total_text_length,
+            "total_images": total_images,
+            "pages_summary": pages_summary
         }
         
         return {
@@ -429,9 +612,11 @@ async def get_content_summary(content_id: str):
             "data": summary
         }
         
+    except HTTPException:
+        raise
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Content not found")
-    except json.JSONDecodeError:
+    except orjson.JSONDecodeError:
         raise HTTPException(status_code=500, detail="Invalid data file format")
     except Exception as e:
         logger.error(f"Error retrieving summary for content {content_id}: {str(e)}")
@@ -444,26 +629,47 @@ async def get_pdf_file(content_id: str):
     Serve PDF file by content ID
     """
     try:
-        logger.info(f"Looking for PDF with content_id: {content_id}")
+        validate_content_id(content_id)
         
         # Find the PDF file with this content ID
-        pdf_files = list(UPLOAD_DIR.glob(f"{content_id}_*.pdf"))
-        logger.info(f"Found PDF files: {[str(f) for f in pdf_files]}")
+        pdf_file = find_pdf_file(content_id)
+        if pdf_file is None:
+            raise HTTPException(status_code=404, detail="PDF file not found")
         
-        if not pdf_files:
-            # List all files in upload directory for debugging
-            all_files = list(UPLOAD_DIR.glob("*.pdf"))
-            logger.info(f"All PDF files in upload dir: {[str(f) for f in all_files]}")
+        try:
+            stat_result = pdf_file.stat()
+        except FileNotFoundError:
+            # Stale index entry (file removed outside the API)
+            PDF_INDEX.pop(content_id, None)
             raise HTTPException(status_code=404, detail="PDF file not found")
         
-        pdf_file = pdf_files[0]
         logger.info(f"Serving PDF file: {pdf_file}")
         
+        if PDF_ACCEL_REDIRECT_PREFIX:
+            # Let the reverse proxy send the file itself
+            filename = pdf_file.name.split('_', 1)[1]  # Remove UUID prefix
+            quoted_filename = quote(filename)
+            if quoted_filename != filename:
+                content_disposition = f"attachment; filename*=utf-8''{quoted_filename}"
+            else:
+                content_disposition = f'attachment; filename="{filename}"'
+            return Response(
+                media_type='application/pdf',
+                headers={
+                    "X-Accel-Redirect": f"{PDF_ACCEL_REDIRECT_PREFIX.rstrip('/')}/{quote(pdf_file.name)}",
+                    "Content-Disposition": content_disposition,
+                }
+            )
+        
         return FileResponse(
             path=pdf_file,
             media_type='application/pdf',
-            filename=pdf_file.name.split('_', 1)[1]  # Remove UUID prefix
+            filename=pdf_file.name.split('_', 1)[1],  # Remove UUID prefix
+            stat_result=stat_result,  # Sets Content-Length without a second stat
+            headers={"Accept-Ranges": "bytes"}  # Lets PDF viewers fetch byte ranges
         )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error serving PDF: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error serving PDF: {str(e)}")
@@ -474,28 +680,38 @@ async def delete_content(content_id: str):
     Delete uploaded content including PDF files, JSON data, and extracted images
     """
     try:
-        deleted_items = []
+        validate_content_id(content_id)
         
-        # Delete PDF files
-        for file_path in UPLOAD_DIR.glob(f"{content_id}_*"):
-            file_path.unlink()
-            deleted_items.append(f"PDF file: {file_path.name}")
+        # Find the PDF files for this content ID
+        pdf_file = PDF_INDEX.pop(content_id, None)
+        if pdf_file is not None:
+            pdf_paths = [pdf_file]
+        else:
+            prefix = f"{content_id}_"
+            with os.scandir(UPLOAD_DIR) as entries:
+                pdf_paths = [Path(entry.path) for entry in entries if entry.name.startswith(prefix)]
         
-        # Delete JSON data file
         json_file_path = DATA_DIR / f"{content_id}.json"
-        if json_file_path.exists():
-            json_file_path.unlink()
-            deleted_items.append(f"Data file: {json_file_path.name}")
-        
-        # Delete image directory
+        page_dir_path = page_data_dir(DATA_DIR, content_id)
         image_dir_path = IMAGES_DIR / content_id
-        if image_dir_path.exists():
-            shutil.rmtree(image_dir_path)
-            deleted_items.append(f"Images directory: {image_dir_path.name}")
+        
+        # Delete everything concurrently; missing items are simply skipped
+        targets = (
+            [(f"PDF file: {path.name}", _remove_file, path) for path in pdf_paths] + [
+                (f"Data file: {json_file_path.name}", _remove_file, json_file_path),
+                (f"Page data directory: {page_dir_path.name}", _remove_tree, page_dir_path),
+                (f"Images directory: {image_dir_path.name}", _remove_tree, image_dir_path),
+            ]
+        )
+        removed = await asyncio.gather(*(asyncio.to_thread(remove, path) for _, remove, path in targets))
+        deleted_items = [label for (label, _, _), was_removed in zip(targets, removed) if was_removed]
         
         if not deleted_items:
             raise HTTPException(status_code=404, detail="Content not found")
         
+        # Drop cached copies of the deleted data files
+        _load_json.cache_clear()
+        
         logger.info(f"Deleted content {content_id}: {deleted_items}")
         
         return {
@@ -511,18 +727,16 @@ async def delete_content(content_id: str):
         raise HTTPException(status_code=500, detail=f"Error deleting content: {str(e)}")
 
 @app.get("/content/{content_id}/topic-extractor-format")
-async def topic_extractor_content(content_id: str):
+async def topic_extractor_content(content_id: str) -> Dict[str, Any]:
     """
     Get content formatted for the TypeScript topic extractor
     """
     try:
+        validate_content_id(content_id)
+        
         # Load the processed data
         json_file_path = DATA_DIR / f"{content_id}.json"
-        if not json_file_path.exists():
-            raise HTTPException(status_code=404, detail="Content not found")
-        
-        with open(json_file_path, 'r', encoding='utf-8') as f:
-            content_data = json.load(f)
+        content_data = load_json_file(json_file_path)
         
         # Format data for topic extractor
         formatted_content = {
@@ -541,27 +755,27 @@ async def topic_extractor_content(content_id: str):
             "data": formatted_content
         }
         
+    except HTTPException:
+        raise
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Content not found")
-    except json.JSONDecodeError:
+    except orjson.JSONDecodeError:
         raise HTTPException(status_code=500, detail="Invalid data file format")
     except Exception as e:
         logger.error(f"Error formatting content for topic extractor {content_id}: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error formatting content: {str(e)}")
 
 @app.get("/content/{content_id}/transcript")
-async def get_transcript_text(content_id: str):
+async def get_transcript_text(content_id: str) -> Dict[str, Any]:
     """
     Get the full transcript text for YouTube content
     """
     try:
+        validate_content_id(content_id)
+        
         # Load the processed data
         json_file_path = DATA_DIR / f"{content_id}.json"
-        if not json_file_path.exists():
-            raise HTTPException(status_code=404, detail="Content not found")
-        
-        with open(json_file_path, 'r', encoding='utf-8') as f:
-            content_data = json.load(f)
+        content_data = load_json_file(json_file_path)
         
         # Check if it's YouTube content
         if content_data.get("content_type") != "youtube":
@@ -583,9 +797,11 @@ async def get_transcript_text(content_id: str):
             }
         }
         
+    except HTTPException:
+        raise
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Content not found")
-    except json.JSONDecodeError:
+    except orjson.JSONDecodeError:
         raise HTTPException(status_code=500, detail="Invalid data file format")
     except Exception as e:
         logger.error(f"Error retrieving transcript for content {content_id}: {str(e)}")
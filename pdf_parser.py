@@ -6,20 +6,196 @@ using pypdf library with various extraction modes and options.
 """
 
 from pypdf import PdfReader
-from typing import List, Dict, Union, Optional, Tuple
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from collections import OrderedDict
+from functools import partial
 import os
 import base64
+import hashlib
+import mmap
+import multiprocessing.util
+import struct
+import threading
 from io import BytesIO
 from PIL import Image
-import os
-import json
+import orjson
 from pathlib import Path
-from typing import Dict, Any, Optional
 import logging
 from datetime import datetime
-logging.basicConfig(level=logging.INFO)
+from utils import write_json_atomic
+
 logger = logging.getLogger(__name__)
 
+# Default number of pool workers for the *_all_pages methods
+DEFAULT_NUM_WORKERS = min(os.cpu_count() or 1, 4)
+
+# Below this many pages the pool startup costs more than it saves
+MIN_PAGES_FOR_WORKERS = 4
+
+# Contiguous page batches handed to each pool worker; a few per worker keeps
+# the load balanced and lets results stream back before the last page is done
+BATCHES_PER_WORKER = 4
+
+# How the *_all_pages methods spread pages: "process" suits pure-Python text
+# layout, "thread" suits image decoding and writes, which release the GIL
+PAGE_MAP_MODES = ("thread", "process", "sequential")
+
+# PDFs up to this size are read into memory in one call; larger ones are
+# memory-mapped so pypdf reads straight from the page cache without a copy
+MMAP_PDF_THRESHOLD = 1 << 20
+
+# Entries kept in each extractor's per-page text and image caches
+EXTRACTION_CACHE_SIZE = 64
+
+# The processed-document JSON is machine-read, so it is written compact;
+# set DEBUG_JSON=1 to pretty-print it when inspecting files by hand
+PROCESSED_JSON_OPTION = orjson.OPT_INDENT_2 if os.environ.get("DEBUG_JSON") else 0
+
+# Image file extensions kept as-is; any other name gets ".png" appended
+_IMG_EXTS = frozenset({'.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff'})
+
+# JPEG start-of-frame markers, which carry the image dimensions
+_JPEG_SOF_MARKERS = frozenset({0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7,
+                               0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF})
+
+def _jpeg_size(image_data: bytes) -> Optional[Tuple[int, int]]:
+    """
+    Read a JPEG's (width, height) from its start-of-frame segment by walking
+    the marker segments that precede it.
+    
+    Returns:
+        Tuple or None: (width, height), or None if no frame header is found
+    """
+    offset = 2
+    data_length = len(image_data)
+    while offset + 4 <= data_length:
+        if image_data[offset] != 0xFF:
+            return None
+        marker = image_data[offset + 1]
+        if marker == 0xFF:  # Fill byte before a marker
+            offset += 1
+            continue
+        if marker == 0x01 or 0xD0 <= marker <= 0xD9:  # Markers without a length
+            offset += 2
+            continue
+        if marker in _JPEG_SOF_MARKERS:
+            if offset + 9 > data_length:
+                return None
+            height, width = struct.unpack(">HH", image_data[offset + 5:offset + 9])
+            return width, height
+        offset += 2 + struct.unpack(">H", image_data[offset + 2:offset + 4])[0]
+    return None
+
+def _sniff_image(image_data: bytes) -> Tuple[Optional[str], Optional[Tuple[int, int]]]:
+    """
+    Identify an image's format, and size where the header makes it cheap, from
+    its leading bytes without handing it to PIL.
+    
+    Returns:
+        Tuple: (PIL-style format name or None, (width, height) or None)
+    """
+    if image_data.startswith(b"\x89PNG\r\n\x1a\n"):
+        if len(image_data) >= 24:
+            return "PNG", struct.unpack(">II", image_data[16:24])
+        return "PNG", None
+    if image_data.startswith(b"\xff\xd8\xff"):
+        return "JPEG", _jpeg_size(image_data)
+    if image_data.startswith((b"GIF87a", b"GIF89a")):
+        if len(image_data) >= 10:
+            return "GIF", struct.unpack("<HH", image_data[6:10])
+        return "GIF", None
+    if image_data.startswith(b"BM"):
+        if len(image_data) >= 26:
+            width, height = struct.unpack("<ii", image_data[18:26])
+            return "BMP", (width, abs(height))
+        return "BMP", None
+    if image_data.startswith((b"II*\x00", b"MM\x00*")):
+        return "TIFF", None
+    return None, None
+
+
+# Extractors opened inside pool worker processes, one per PDF path
+_worker_extractors: Dict[str, "PDFTextExtractor"] = {}
+
+
+def _close_extractors(extractors: Dict[Any, "PDFTextExtractor"]) -> None:
+    """
+    Close and forget every extractor in an extractor cache.
+    """
+    while extractors:
+        _, extractor = extractors.popitem()
+        extractor.close()
+
+
+def _init_pdf_worker() -> None:
+    """
+    Pool worker initializer: close the worker's extractors when the process exits.
+    """
+    multiprocessing.util.Finalize(None, _close_extractors, args=(_worker_extractors,), exitpriority=0)
+
+
+def _extract_pages_with(extractor: "PDFTextExtractor", method_name: str, page_numbers: List[int],
+                        kwargs: Dict[str, Any]) -> List[Tuple[Any, Optional[str]]]:
+    """
+    Run a per-page extraction method over a batch of pages, keeping per-page errors.
+    
+    Returns:
+        List[Tuple]: (result, None) on success or (None, error message) on failure, per page
+    """
+    method = getattr(extractor, method_name)
+    results = []
+    for page_number in page_numbers:
+        try:
+            results.append((method(page_number, **kwargs), None))
+        except Exception as e:
+            results.append((None, str(e)))
+    return results
+
+
+def _extract_pages_in_worker(pdf_path: str, method_name: str, page_numbers: List[int],
+                             kwargs: Dict[str, Any]) -> List[Tuple[Any, Optional[str]]]:
+    """
+    Run a per-page extraction method over a batch of pages in a pool worker.
+    
+    The PdfReader is built inside the worker (reader objects don't pickle reliably)
+    and reused for every batch that worker handles.
+    
+    Returns:
+        List[Tuple]: (result, None) on success or (None, error message) on failure, per page
+    """
+    extractor = _worker_extractors.get(pdf_path)
+    if extractor is None:
+        try:
+            extractor = _worker_extractors[pdf_path] = PDFTextExtractor(pdf_path)
+        except Exception as e:
+            # Report the failure against each page, as the in-process path would
+            return [(None, str(e))] * len(page_numbers)
+    return _extract_pages_with(extractor, method_name, page_numbers, kwargs)
+
+
+def _extract_pages_in_thread(extractors: Dict[int, "PDFTextExtractor"], pdf_path: str,
+                             method_name: str, page_numbers: List[int],
+                             kwargs: Dict[str, Any]) -> List[Tuple[Any, Optional[str]]]:
+    """
+    Run a per-page extraction method over a batch of pages in a pool worker thread.
+    
+    Each thread gets its own PdfReader, since a reader's stream can't be read
+    from several threads at once. They are kept in extractors, keyed on thread
+    ID, so the caller can close them once the pool is done.
+    
+    Returns:
+        List[Tuple]: (result, None) on success or (None, error message) on failure, per page
+    """
+    thread_id = threading.get_ident()
+    extractor = extractors.get(thread_id)
+    if extractor is None:
+        try:
+            extractor = extractors[thread_id] = PDFTextExtractor(pdf_path)
+        except Exception as e:
+            # Report the failure against each page, as the in-process path would
+            return [(None, str(e))] * len(page_numbers)
+    return _extract_pages_with(extractor, method_name, page_numbers, kwargs)
 
 
 class PDFTextExtractor:
@@ -27,12 +203,15 @@ class PDFTextExtractor:
     A class for extracting text from PDF files with various options and modes.
     """
     
-    def __init__(self, pdf_path: str):
+    def __init__(self, pdf_path: str, cache_images: bool = True):
         """
         Initialize the PDF text extractor.
         
         Args:
             pdf_path (str): Path to the PDF file
+            cache_images (bool): Whether to cache per-page image metadata and the
+                output directories already created. Turn off for long-lived
+                extractors, whose cached saved paths would go stale.
             
         Raises:
             FileNotFoundError: If the PDF file doesn't exist
@@ -41,12 +220,156 @@ class PDFTextExtractor:
         if not os.path.exists(pdf_path):
             raise FileNotFoundError(f"PDF file not found: {pdf_path}")
         
+        self._file = None
+        self._mmap = None
         try:
-            self.reader = PdfReader(pdf_path)
+            if os.path.getsize(pdf_path) > MMAP_PDF_THRESHOLD:
+                # Hand pypdf the mapping itself; BytesIO(mmap) would copy the whole file
+                self._file = open(pdf_path, 'rb')
+                self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+                self.reader = PdfReader(self._mmap)
+            else:
+                with open(pdf_path, 'rb') as f:
+                    self.reader = PdfReader(BytesIO(f.read()))
             self.pdf_path = pdf_path
             self.num_pages = len(self.reader.pages)
         except Exception as e:
+            self.close()
             raise Exception(f"Error reading PDF file: {str(e)}")
+        
+        # Image output directories already created by this extractor
+        self._cache_images = cache_images
+        self._created_dirs = set()
+        
+        # LRU caches of per-page results, keyed on the page and extraction options
+        self._text_cache: "OrderedDict[tuple, str]" = OrderedDict()
+        self._image_cache: "OrderedDict[tuple, list]" = OrderedDict()
+    
+    def close(self) -> None:
+        """
+        Release the memory map and file handle kept open for large PDFs.
+        """
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+    
+    def __enter__(self) -> "PDFTextExtractor":
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+    
+    def _ensure_output_dir(self, output_dir: str) -> None:
+        """
+        Create an image output directory the first time it is used (every time
+        when image caching is off, in case it was removed since).
+        """
+        if output_dir not in self._created_dirs:
+            os.makedirs(output_dir, exist_ok=True)
+            if self._cache_images:
+                self._created_dirs.add(output_dir)
+    
+    @staticmethod
+    def _report_errors(action: str, failures: List[Tuple[int, str]],
+                       errors: Optional[List[Tuple[int, str]]]) -> None:
+        """
+        Log a single warning covering every failed page and pass the failures
+        on to the caller's errors list, if one was given.
+        """
+        if not failures:
+            return
+        logger.warning(f"Error {action} from {len(failures)} page(s): "
+                       + "; ".join(f"page {page_num}: {message}" for page_num, message in failures))
+        if errors is not None:
+            errors.extend(failures)
+    
+    @staticmethod
+    def _cache_get(cache: OrderedDict, key: tuple) -> Any:
+        """
+        Return a cached value (or None), marking it as most recently used.
+        """
+        value = cache.get(key)
+        if value is not None:
+            cache.move_to_end(key)
+        return value
+    
+    @staticmethod
+    def _cache_put(cache: OrderedDict, key: tuple, value: Any) -> None:
+        """
+        Store a value, evicting the least recently used entry when full.
+        """
+        cache[key] = value
+        if len(cache) > EXTRACTION_CACHE_SIZE:
+            cache.popitem(last=False)
+    
+    def _iter_pages(self, method_name: str, page_numbers: List[int], kwargs: Dict[str, Any],
+                    num_workers: int, mode: str = "process") -> Iterator[Tuple[Any, Optional[str]]]:
+        """
+        Apply a per-page extraction method to several pages, yielding in page order.
+        
+        Pages are spread over a thread or process pool (per mode) when num_workers > 1
+        and there are enough pages to make it worthwhile; otherwise they run here,
+        one page per step. Pool tasks are contiguous batches of pages, a few per
+        worker, so results stream back without a round trip per page. Closing the
+        iterator early cancels batches not yet started.
+        
+        Yields:
+            Tuple: (result, error message) per page; error is None on success
+        """
+        if mode not in PAGE_MAP_MODES:
+            raise ValueError(f"mode must be one of {PAGE_MAP_MODES}")
+        
+        if mode == "sequential" or num_workers <= 1 or len(page_numbers) < MIN_PAGES_FOR_WORKERS:
+            method = getattr(self, method_name)
+            for page_num in page_numbers:
+                try:
+                    yield method(page_num, **kwargs), None
+                except Exception as e:
+                    yield None, str(e)
+            return
+        
+        num_workers = min(num_workers, len(page_numbers))
+        num_batches = min(num_workers * BATCHES_PER_WORKER, len(page_numbers))
+        batch_size, remainder = divmod(len(page_numbers), num_batches)
+        batches = []
+        start = 0
+        for batch_index in range(num_batches):
+            end = start + batch_size + (1 if batch_index < remainder else 0)
+            batches.append(page_numbers[start:end])
+            start = end
+        
+        thread_extractors: Dict[int, PDFTextExtractor] = {}
+        if mode == "thread":
+            executor = ThreadPoolExecutor(max_workers=num_workers)
+            extract_pages = partial(_extract_pages_in_thread, thread_extractors)
+        else:
+            executor = ProcessPoolExecutor(max_workers=num_workers, initializer=_init_pdf_worker)
+            extract_pages = _extract_pages_in_worker
+        try:
+            for batch_results in executor.map(
+                extract_pages,
+                [self.pdf_path] * num_batches,
+                [method_name] * num_batches,
+                batches,
+                [kwargs] * num_batches
+            ):
+                yield from batch_results
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+            _close_extractors(thread_extractors)
+    
+    def _map_pages(self, method_name: str, page_numbers: List[int], kwargs: Dict[str, Any],
+                   num_workers: int, mode: str = "process") -> List[Tuple[Any, Optional[str]]]:
+        """
+        List form of _iter_pages.
+        
+        Returns:
+            List[Tuple]: (result, error message) per page; error is None on success
+        """
+        return list(self._iter_pages(method_name, page_numbers, kwargs, num_workers, mode))
     
     def extract_text_from_page(self, page_number: int, 
                               orientations: Optional[Union[int, Tuple[int, ...]]] = None,
@@ -77,29 +400,50 @@ class PDFTextExtractor:
         if page_number < 0 or page_number >= self.num_pages:
             raise IndexError(f"Page number {page_number} out of range (0-{self.num_pages-1})")
         
+        # Lists are accepted like tuples, but the cache key needs something hashable
+        if isinstance(orientations, list):
+            orientations = tuple(orientations)
+        
+        if extraction_mode == "plain":
+            # Layout options don't affect plain extraction, so keep them out of the key
+            cache_key = (page_number, extraction_mode, orientations)
+        elif extraction_mode == "layout":
+            cache_key = (page_number, extraction_mode, layout_mode_space_vertically,
+                         layout_mode_scale_weight, layout_mode_strip_rotated)
+        else:
+            raise ValueError("extraction_mode must be 'plain' or 'layout'")
+        
+        text = self._cache_get(self._text_cache, cache_key)
+        if text is not None:
+            return text
+        
         page = self.reader.pages[page_number]
         
         if extraction_mode == "plain":
             if orientations is None:
-                return page.extract_text()
+                text = page.extract_text()
             else:
-                return page.extract_text(orientations)
-        elif extraction_mode == "layout":
-            return page.extract_text(
+                text = page.extract_text(orientations)
+        else:
+            text = page.extract_text(
                 extraction_mode="layout",
                 layout_mode_space_vertically=layout_mode_space_vertically,
                 layout_mode_scale_weight=layout_mode_scale_weight,
                 layout_mode_strip_rotated=layout_mode_strip_rotated
             )
-        else:
-            raise ValueError("extraction_mode must be 'plain' or 'layout'")
+        
+        self._cache_put(self._text_cache, cache_key, text)
+        return text
     
     def extract_text_all_pages(self, 
                               orientations: Optional[Union[int, Tuple[int, ...]]] = None,
                               extraction_mode: str = "plain",
                               layout_mode_space_vertically: bool = True,
                               layout_mode_scale_weight: float = 1.0,
-                              layout_mode_strip_rotated: bool = True) -> List[str]:
+                              layout_mode_strip_rotated: bool = True,
+                              num_workers: int = DEFAULT_NUM_WORKERS,
+                              mode: str = "process",
+                              errors: Optional[List[Tuple[int, str]]] = None) -> List[str]:
         """
         Extract text from all pages in the PDF.
         
@@ -109,35 +453,66 @@ class PDFTextExtractor:
             layout_mode_space_vertically (bool): Preserve vertical spacing (layout mode only)
             layout_mode_scale_weight (float): Horizontal spacing adjustment (layout mode only)
             layout_mode_strip_rotated (bool): Exclude rotated text (layout mode only)
+            num_workers (int): Workers to spread pages over (1 = sequential)
+            mode (str): 'process', 'thread' or 'sequential' page dispatch
+            errors (list, optional): If given, (page_number, message) is appended for each failed page
             
         Returns:
             List[str]: List of extracted text for each page
         """
-        all_pages_text = []
-        
-        for page_num in range(self.num_pages):
-            try:
-                text = self.extract_text_from_page(
-                    page_num,
-                    orientations=orientations,
-                    extraction_mode=extraction_mode,
-                    layout_mode_space_vertically=layout_mode_space_vertically,
-                    layout_mode_scale_weight=layout_mode_scale_weight,
-                    layout_mode_strip_rotated=layout_mode_strip_rotated
-                )
-                all_pages_text.append(text)
-            except Exception as e:
-                print(f"Error extracting text from page {page_num}: {str(e)}")
-                all_pages_text.append("")
+        return list(self.iter_text_all_pages(
+            orientations=orientations,
+            extraction_mode=extraction_mode,
+            layout_mode_space_vertically=layout_mode_space_vertically,
+            layout_mode_scale_weight=layout_mode_scale_weight,
+            layout_mode_strip_rotated=layout_mode_strip_rotated,
+            num_workers=num_workers,
+            mode=mode,
+            errors=errors
+        ))
+    
+    def iter_text_all_pages(self, 
+                           orientations: Optional[Union[int, Tuple[int, ...]]] = None,
+                           extraction_mode: str = "plain",
+                           layout_mode_space_vertically: bool = True,
+                           layout_mode_scale_weight: float = 1.0,
+                           layout_mode_strip_rotated: bool = True,
+                           num_workers: int = DEFAULT_NUM_WORKERS,
+                           mode: str = "process",
+                           errors: Optional[List[Tuple[int, str]]] = None) -> Iterator[str]:
+        """
+        Extract text from all pages in the PDF, yielding one page at a time.
         
-        return all_pages_text
+        Args:
+            (same as extract_text_all_pages)
+            
+        Yields:
+            str: Extracted text for each page, in page order
+        """
+        if self.num_pages == 0:
+            return
+        
+        yield from self.iter_text_page_range(
+            0, self.num_pages,
+            orientations=orientations,
+            extraction_mode=extraction_mode,
+            layout_mode_space_vertically=layout_mode_space_vertically,
+            layout_mode_scale_weight=layout_mode_scale_weight,
+            layout_mode_strip_rotated=layout_mode_strip_rotated,
+            num_workers=num_workers,
+            mode=mode,
+            errors=errors
+        )
     
     def extract_text_page_range(self, start_page: int, end_page: int,
                                orientations: Optional[Union[int, Tuple[int, ...]]] = None,
                                extraction_mode: str = "plain",
                                layout_mode_space_vertically: bool = True,
                                layout_mode_scale_weight: float = 1.0,
-                               layout_mode_strip_rotated: bool = True) -> List[str]:
+                               layout_mode_strip_rotated: bool = True,
+                               num_workers: int = DEFAULT_NUM_WORKERS,
+                               mode: str = "process",
+                               errors: Optional[List[Tuple[int, str]]] = None) -> List[str]:
         """
         Extract text from a range of pages.
         
@@ -149,31 +524,68 @@ class PDFTextExtractor:
             layout_mode_space_vertically (bool): Preserve vertical spacing (layout mode only)
             layout_mode_scale_weight (float): Horizontal spacing adjustment (layout mode only)
             layout_mode_strip_rotated (bool): Exclude rotated text (layout mode only)
+            num_workers (int): Workers to spread pages over (1 = sequential)
+            mode (str): 'process', 'thread' or 'sequential' page dispatch
+            errors (list, optional): If given, (page_number, message) is appended for each failed page
             
         Returns:
             List[str]: List of extracted text for each page in the range
         """
+        return list(self.iter_text_page_range(
+            start_page, end_page,
+            orientations=orientations,
+            extraction_mode=extraction_mode,
+            layout_mode_space_vertically=layout_mode_space_vertically,
+            layout_mode_scale_weight=layout_mode_scale_weight,
+            layout_mode_strip_rotated=layout_mode_strip_rotated,
+            num_workers=num_workers,
+            mode=mode,
+            errors=errors
+        ))
+    
+    def iter_text_page_range(self, start_page: int, end_page: int,
+                            orientations: Optional[Union[int, Tuple[int, ...]]] = None,
+                            extraction_mode: str = "plain",
+                            layout_mode_space_vertically: bool = True,
+                            layout_mode_scale_weight: float = 1.0,
+                            layout_mode_strip_rotated: bool = True,
+                            num_workers: int = DEFAULT_NUM_WORKERS,
+                            mode: str = "process",
+                            errors: Optional[List[Tuple[int, str]]] = None) -> Iterator[str]:
+        """
+        Extract text from a range of pages, yielding one page at a time.
+        
+        Failed pages yield an empty string and are logged once the iterator
+        finishes or is closed.
+        
+        Args:
+            (same as extract_text_page_range)
+            
+        Yields:
+            str: Extracted text for each page in the range, in page order
+        """
         if start_page < 0 or end_page > self.num_pages or start_page >= end_page:
             raise ValueError(f"Invalid page range: {start_page}-{end_page}")
         
-        pages_text = []
+        page_numbers = list(range(start_page, end_page))
+        results = self._iter_pages("extract_text_from_page", page_numbers, {
+            'orientations': orientations,
+            'extraction_mode': extraction_mode,
+            'layout_mode_space_vertically': layout_mode_space_vertically,
+            'layout_mode_scale_weight': layout_mode_scale_weight,
+            'layout_mode_strip_rotated': layout_mode_strip_rotated
+        }, num_workers, mode)
         
-        for page_num in range(start_page, end_page):
-            try:
-                text = self.extract_text_from_page(
-                    page_num,
-                    orientations=orientations,
-                    extraction_mode=extraction_mode,
-                    layout_mode_space_vertically=layout_mode_space_vertically,
-                    layout_mode_scale_weight=layout_mode_scale_weight,
-                    layout_mode_strip_rotated=layout_mode_strip_rotated
-                )
-                pages_text.append(text)
-            except Exception as e:
-                print(f"Error extracting text from page {page_num}: {str(e)}")
-                pages_text.append("")
-        
-        return pages_text
+        failures = []
+        try:
+            for page_num, (text, error) in zip(page_numbers, results):
+                if error is not None:
+                    failures.append((page_num, error))
+                    text = ""
+                yield text
+        finally:
+            results.close()
+            self._report_errors("extracting text", failures, errors)
     
     def get_pdf_info(self) -> Dict[str, Union[str, int]]:
         """
@@ -203,7 +615,11 @@ class PDFTextExtractor:
         return info
     
     def extract_images_from_page(self, page_number: int, save_to_disk: bool = False, 
-                                output_dir: str = "extracted_images") -> List[Dict[str, Union[str, bytes]]]:
+                                output_dir: str = "extracted_images",
+                                include_base64: bool = False,
+                                include_sha256: bool = False,
+                                probe_with_pil: bool = True,
+                                return_bytes: bool = True) -> List[Dict[str, Union[str, bytes]]]:
         """
         Extract images from a specific page.
         
@@ -211,23 +627,41 @@ class PDFTextExtractor:
             page_number (int): Page number (0-indexed)
             save_to_disk (bool): Whether to save images to disk
             output_dir (str): Directory to save images (if save_to_disk is True)
+            include_base64 (bool): Whether to add a base64 encoding of each image
+            include_sha256 (bool): Whether to add a SHA-256 hex digest of each image
+            probe_with_pil (bool): Whether to open images with PIL when format/size
+                can't be read from the file header
+            return_bytes (bool): Whether to keep the raw image bytes in the result;
+                turn off when saving to disk and only the metadata is needed
             
         Returns:
             List[Dict]: List of image information dictionaries containing:
                 - name: Image filename
-                - data: Image bytes
-                - base64: Base64 encoded image data
+                - data: Image bytes (None if return_bytes is False)
+                - base64: Base64 encoded image data (only if include_base64 is True)
+                - sha256: SHA-256 hex digest of the image data (only if include_sha256 is True)
                 - format: Image format (if determinable)
                 - size: Image size tuple (width, height) if available
         """
         if page_number < 0 or page_number >= self.num_pages:
             raise IndexError(f"Page number {page_number} out of range (0-{self.num_pages-1})")
         
+        # A cache hit skips stream decoding and PIL probing. Results carrying
+        # image bytes or base64 aren't cached, so the cache only holds metadata
+        use_cache = self._cache_images and not (return_bytes or include_base64)
+        cache_key = (page_number, save_to_disk, output_dir if save_to_disk else None,
+                     include_sha256, probe_with_pil)
+        if use_cache:
+            cached_images = self._cache_get(self._image_cache, cache_key)
+            if cached_images is not None:
+                return [dict(image_info) for image_info in cached_images]
+        
         page = self.reader.pages[page_number]
         images = []
+        failures = []
         
         if save_to_disk:
-            os.makedirs(output_dir, exist_ok=True)
+            self._ensure_output_dir(output_dir)
         
         for count, image_file_object in enumerate(page.images):
             try:
@@ -235,70 +669,108 @@ class PDFTextExtractor:
                 image_name = image_file_object.name or f"image_{count}"
                 
                 # Ensure image name has an extension
-                if not any(image_name.lower().endswith(ext) for ext in ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff']):
+                if os.path.splitext(image_name)[1].lower() not in _IMG_EXTS:
                     image_name += ".png"  # Default to PNG if no extension
                 
-                # Convert to base64 for easy transmission/storage
-                base64_data = base64.b64encode(image_data).decode('utf-8')
-                
-                # Try to get image format and size using PIL
-                image_format = None
-                image_size = None
-                try:
-                    with BytesIO(image_data) as img_buffer:
-                        with Image.open(img_buffer) as pil_image:
-                            image_format = pil_image.format
-                            image_size = pil_image.size
-                except Exception:
-                    pass  # If PIL can't read it, continue without format/size info
+                # Read format/size from the header, falling back to PIL when needed
+                image_format, image_size = _sniff_image(image_data)
+                if image_size is None and probe_with_pil:
+                    try:
+                        with BytesIO(image_data) as img_buffer:
+                            with Image.open(img_buffer) as pil_image:
+                                image_format = pil_image.format
+                                image_size = pil_image.size
+                    except Exception:
+                        pass  # If PIL can't read it, continue without format/size info
                 
                 image_info = {
                     'name': image_name,
-                    'data': image_data,
-                    'base64': base64_data,
+                    'data': image_data if return_bytes else None,
                     'format': image_format,
                     'size': image_size,
                     'page_number': page_number
                 }
                 
+                # Convert to base64 for easy transmission/storage
+                if include_base64:
+                    image_info['base64'] = base64.b64encode(image_data).decode('utf-8')
+                
+                # Hash here so callers can identify the image without keeping its bytes
+                if include_sha256:
+                    image_info['sha256'] = hashlib.sha256(image_data).hexdigest()
+                
                 # Save to disk if requested
                 if save_to_disk:
-                    file_path = os.path.join(output_dir, f"page_{page_number}_{image_name}")
-                    with open(file_path, "wb") as fp:
+                    file_path = f"{output_dir}{os.sep}page_{page_number}_{image_name}"
+                    with open(file_path, "wb", buffering=65536) as fp:
                         fp.write(image_data)
                     image_info['file_path'] = file_path
                 
                 images.append(image_info)
                 
             except Exception as e:
-                print(f"Error extracting image {count} from page {page_number}: {str(e)}")
+                failures.append(f"image {count}: {str(e)}")
                 continue
         
+        if failures:
+            logger.warning(f"Error extracting {len(failures)} image(s) from page {page_number}: "
+                           + "; ".join(failures))
+        
+        if use_cache:
+            # Cache copies so callers can't change the cached entries
+            self._cache_put(self._image_cache, cache_key, [dict(image_info) for image_info in images])
         return images
     
     def extract_images_all_pages(self, save_to_disk: bool = False, 
-                                output_dir: str = "extracted_images") -> Dict[int, List[Dict[str, Union[str, bytes]]]]:
+                                output_dir: str = "extracted_images",
+                                include_base64: bool = False,
+                                include_sha256: bool = False,
+                                probe_with_pil: bool = True,
+                                return_bytes: bool = True,
+                                num_workers: int = DEFAULT_NUM_WORKERS,
+                                mode: str = "thread",
+                                errors: Optional[List[Tuple[int, str]]] = None) -> Dict[int, List[Dict[str, Union[str, bytes]]]]:
         """
         Extract images from all pages in the PDF.
         
         Args:
             save_to_disk (bool): Whether to save images to disk
             output_dir (str): Directory to save images (if save_to_disk is True)
+            include_base64 (bool): Whether to add a base64 encoding of each image
+            include_sha256 (bool): Whether to add a SHA-256 hex digest of each image
+            probe_with_pil (bool): Whether to fall back to PIL for format/size
+            return_bytes (bool): Whether to keep the raw image bytes in the results
+            num_workers (int): Workers to spread pages over (1 = sequential)
+            mode (str): 'process', 'thread' or 'sequential' page dispatch
+            errors (list, optional): If given, (page_number, message) is appended for each failed page
             
         Returns:
             Dict[int, List[Dict]]: Dictionary mapping page numbers to lists of image info dictionaries
         """
+        if save_to_disk:
+            self._ensure_output_dir(output_dir)
+        
+        page_numbers = list(range(self.num_pages))
+        results = self._map_pages("extract_images_from_page", page_numbers, {
+            'save_to_disk': save_to_disk,
+            'output_dir': output_dir,
+            'include_base64': include_base64,
+            'include_sha256': include_sha256,
+            'probe_with_pil': probe_with_pil,
+            'return_bytes': return_bytes
+        }, num_workers, mode)
+        
         all_images = {}
+        failures = []
         
-        for page_num in range(self.num_pages):
-            try:
-                images = self.extract_images_from_page(page_num, save_to_disk, output_dir)
-                if images:  # Only add if images were found
-                    all_images[page_num] = images
-            except Exception as e:
-                print(f"Error extracting images from page {page_num}: {str(e)}")
+        for page_num, (images, error) in zip(page_numbers, results):
+            if error is not None:
+                failures.append((page_num, error))
                 continue
+            if images:  # Only add if images were found
+                all_images[page_num] = images
         
+        self._report_errors("extracting images", failures, errors)
         return all_images
     
     def extract_content_from_page(self, page_number: int, 
@@ -309,7 +781,11 @@ class PDFTextExtractor:
                                  extraction_mode: str = "plain",
                                  layout_mode_space_vertically: bool = True,
                                  layout_mode_scale_weight: float = 1.0,
-                                 layout_mode_strip_rotated: bool = True) -> Dict[str, Union[str, List]]:
+                                 layout_mode_strip_rotated: bool = True,
+                                 include_base64: bool = False,
+                                 include_sha256: bool = False,
+                                 probe_with_pil: bool = True,
+                                 return_bytes: bool = True) -> Dict[str, Union[str, List]]:
         """
         Extract both text and images from a specific page.
         
@@ -318,6 +794,10 @@ class PDFTextExtractor:
             include_images (bool): Whether to extract images
             save_images_to_disk (bool): Whether to save images to disk
             output_dir (str): Directory to save images
+            include_base64 (bool): Whether to add a base64 encoding of each image
+            include_sha256 (bool): Whether to add a SHA-256 hex digest of each image
+            probe_with_pil (bool): Whether to fall back to PIL for image format/size
+            return_bytes (bool): Whether to keep the raw image bytes in the result
             (other args same as extract_text_from_page)
             
         Returns:
@@ -338,7 +818,9 @@ class PDFTextExtractor:
         
         if include_images:
             result['images'] = self.extract_images_from_page(
-                page_number, save_images_to_disk, output_dir
+                page_number, save_images_to_disk, output_dir,
+                include_base64=include_base64, include_sha256=include_sha256,
+                probe_with_pil=probe_with_pil, return_bytes=return_bytes
             )
         
         return result
@@ -351,7 +833,14 @@ class PDFTextExtractor:
                                  extraction_mode: str = "plain",
                                  layout_mode_space_vertically: bool = True,
                                  layout_mode_scale_weight: float = 1.0,
-                                 layout_mode_strip_rotated: bool = True) -> List[Dict[str, Union[str, List]]]:
+                                 layout_mode_strip_rotated: bool = True,
+                                 include_base64: bool = False,
+                                 include_sha256: bool = False,
+                                 probe_with_pil: bool = True,
+                                 return_bytes: bool = True,
+                                 num_workers: int = DEFAULT_NUM_WORKERS,
+                                 mode: str = "process",
+                                 errors: Optional[List[Tuple[int, str]]] = None) -> List[Dict[str, Union[str, List]]]:
         """
         Extract both text and images from all pages.
         
@@ -359,31 +848,135 @@ class PDFTextExtractor:
             include_images (bool): Whether to extract images
             save_images_to_disk (bool): Whether to save images to disk
             output_dir (str): Directory to save images
+            include_base64 (bool): Whether to add a base64 encoding of each image
+            include_sha256 (bool): Whether to add a SHA-256 hex digest of each image
+            probe_with_pil (bool): Whether to fall back to PIL for image format/size
+            return_bytes (bool): Whether to keep the raw image bytes in the results
+            num_workers (int): Workers to spread pages over (1 = sequential)
+            mode (str): 'process', 'thread' or 'sequential' page dispatch
+            errors (list, optional): If given, (page_number, message) is appended for each failed page
             (other args same as extract_text_from_page)
             
         Returns:
             List[Dict]: List of page content dictionaries
         """
-        all_content = []
+        return list(self.iter_content_all_pages(
+            include_images=include_images,
+            save_images_to_disk=save_images_to_disk,
+            output_dir=output_dir,
+            orientations=orientations,
+            extraction_mode=extraction_mode,
+            layout_mode_space_vertically=layout_mode_space_vertically,
+            layout_mode_scale_weight=layout_mode_scale_weight,
+            layout_mode_strip_rotated=layout_mode_strip_rotated,
+            include_base64=include_base64,
+            include_sha256=include_sha256,
+            probe_with_pil=probe_with_pil,
+            return_bytes=return_bytes,
+            num_workers=num_workers,
+            mode=mode,
+            errors=errors
+        ))
+    
+    def iter_content_all_pages(self, 
+                              include_images: bool = True,
+                              save_images_to_disk: bool = False,
+                              output_dir: str = "extracted_images",
+                              orientations: Optional[Union[int, Tuple[int, ...]]] = None,
+                              extraction_mode: str = "plain",
+                              layout_mode_space_vertically: bool = True,
+                              layout_mode_scale_weight: float = 1.0,
+                              layout_mode_strip_rotated: bool = True,
+                              include_base64: bool = False,
+                              include_sha256: bool = False,
+                              probe_with_pil: bool = True,
+                              return_bytes: bool = True,
+                              num_workers: int = DEFAULT_NUM_WORKERS,
+                              mode: str = "process",
+                              errors: Optional[List[Tuple[int, str]]] = None) -> Iterator[Dict[str, Union[str, List]]]:
+        """
+        Extract both text and images from all pages, yielding one page at a time.
         
-        for page_num in range(self.num_pages):
-            try:
-                content = self.extract_content_from_page(
-                    page_num, include_images, save_images_to_disk, output_dir,
-                    orientations, extraction_mode, layout_mode_space_vertically,
-                    layout_mode_scale_weight, layout_mode_strip_rotated
-                )
-                all_content.append(content)
-            except Exception as e:
-                print(f"Error extracting content from page {page_num}: {str(e)}")
-                # Add empty content for failed pages
-                all_content.append({
-                    'page_number': page_num,
-                    'text': '',
-                    'images': []
-                })
+        Failed pages yield empty content and are logged once the iterator
+        finishes or is closed.
         
-        return all_content
+        Args:
+            (same as extract_content_all_pages)
+            
+        Yields:
+            Dict: Page content dictionary for each page, in page order
+        """
+        if include_images and save_images_to_disk:
+            self._ensure_output_dir(output_dir)
+        
+        page_numbers = list(range(self.num_pages))
+        results = self._iter_pages("extract_content_from_page", page_numbers, {
+            'include_images': include_images,
+            'save_images_to_disk': save_images_to_disk,
+            'output_dir': output_dir,
+            'orientations': orientations,
+            'extraction_mode': extraction_mode,
+            'layout_mode_space_vertically': layout_mode_space_vertically,
+            'layout_mode_scale_weight': layout_mode_scale_weight,
+            'layout_mode_strip_rotated': layout_mode_strip_rotated,
+            'include_base64': include_base64,
+            'include_sha256': include_sha256,
+            'probe_with_pil': probe_with_pil,
+            'return_bytes': return_bytes
+        }, num_workers, mode)
+        
+        failures = []
+        try:
+            for page_num, (content, error) in zip(page_numbers, results):
+                if error is not None:
+                    failures.append((page_num, error))
+                    # Add empty content for failed pages
+                    content = {
+                        'page_number': page_num,
+                        'text': '',
+                        'images': []
+                    }
+                yield content
+        finally:
+            results.close()
+            self._report_errors("extracting content", failures, errors)
+
+
+# Extractors reused by the standalone functions, per thread (a reader's stream
+# can't be read from several threads at once), keyed on PDF path and
+# modification time, least recently used first
+SHARED_EXTRACTOR_CACHE_SIZE = 8
+_shared_extractors = threading.local()
+
+
+def _get_extractor(pdf_path: str) -> PDFTextExtractor:
+    """
+    Return this thread's extractor for pdf_path, reopening the PDF only when the file changes.
+    
+    Extractors dropped from the cache (evicted, or superseded by a newer
+    version of the same file) are closed. They don't cache images, since saved
+    files and output directories can be removed while they stay open.
+    """
+    try:
+        mtime_ns = os.stat(pdf_path).st_mtime_ns
+    except FileNotFoundError:
+        raise FileNotFoundError(f"PDF file not found: {pdf_path}")
+    extractors = getattr(_shared_extractors, "by_key", None)
+    if extractors is None:
+        extractors = _shared_extractors.by_key = OrderedDict()
+    key = (pdf_path, mtime_ns)
+    extractor = extractors.get(key)
+    if extractor is not None:
+        extractors.move_to_end(key)
+        return extractor
+    extractor = PDFTextExtractor(pdf_path, cache_images=False)
+    for stale_key in [k for k in extractors if k[0] == pdf_path]:
+        extractors.pop(stale_key).close()
+    extractors[key] = extractor
+    if len(extractors) > SHARED_EXTRACTOR_CACHE_SIZE:
+        _, evicted = extractors.popitem(last=False)
+        evicted.close()
+    return extractor
 
 
 # Standalone functions for quick usage
@@ -402,7 +995,7 @@ def extract_text_from_pdf_page(pdf_path: str, page_number: int,
     Returns:
         str: Extracted text from the page
     """
-    extractor = PDFTextExtractor(pdf_path)
+    extractor = _get_extractor(pdf_path)
     return extractor.extract_text_from_page(page_number, orientations, extraction_mode)
 
 
@@ -420,7 +1013,7 @@ def extract_text_from_all_pages(pdf_path: str,
     Returns:
         List[str]: List of extracted text for each page
     """
-    extractor = PDFTextExtractor(pdf_path)
+    extractor = _get_extractor(pdf_path)
     return extractor.extract_text_all_pages(orientations, extraction_mode)
 
 
@@ -439,7 +1032,7 @@ def extract_images_from_pdf_page(pdf_path: str, page_number: int,
     Returns:
         List[Dict]: List of image info dictionaries
     """
-    extractor = PDFTextExtractor(pdf_path)
+    extractor = _get_extractor(pdf_path)
     return extractor.extract_images_from_page(page_number, save_to_disk, output_dir)
 
 
@@ -460,7 +1053,7 @@ def extract_content_from_pdf_page(pdf_path: str, page_number: int,
     Returns:
         Dict: Page content dictionary with text and images
     """
-    extractor = PDFTextExtractor(pdf_path)
+    extractor = _get_extractor(pdf_path)
     return extractor.extract_content_from_page(
         page_number, include_images, save_images_to_disk, 
         extraction_mode=extraction_mode
@@ -478,7 +1071,7 @@ def demonstrate_extraction_modes(pdf_path: str, page_number: int = 0) -> Dict[st
     Returns:
         Dict[str, str]: Dictionary with different extraction results
     """
-    extractor = PDFTextExtractor(pdf_path)
+    extractor = _get_extractor(pdf_path)
     
     results = {}
     
@@ -525,118 +1118,120 @@ def demonstrate_extraction_modes(pdf_path: str, page_number: int = 0) -> Dict[st
 
 
 # Example usage
-if __name__ == "__main__":
-    # Example usage of the PDF text extraction functions
-    pdf_file = "example.pdf"  # Replace with your PDF file path
+def demo(pdf_file: str = "example.pdf") -> None:
+    """
+    Example usage of the PDF text extraction functions.
     
+    Args:
+        pdf_file (str): Path to the PDF file to run the examples against
+    """
     try:
-        # Initialize extractor
-        extractor = PDFTextExtractor(pdf_file)
-        
-        # Get PDF info
-        print("PDF Info:")
-        info = extractor.get_pdf_info()
-        for key, value in info.items():
-            print(f"  {key}: {value}")
-        print()
-        
-        # Extract text from first page using different methods
-        print("=== Different Extraction Methods for Page 0 ===")
-        
-        # Basic extraction
-        print("1. Basic text extraction:")
-        text = extractor.extract_text_from_page(0)
-        print(text[:200] + "..." if len(text) > 200 else text)
-        print()
-        
-        # Extract only upward-oriented text
-        print("2. Extract only text oriented up:")
-        text = extractor.extract_text_from_page(0, orientations=0)
-        print(text[:200] + "..." if len(text) > 200 else text)
-        print()
-        
-        # Extract text oriented up and turned left
-        print("3. Extract text oriented up and turned left:")
-        text = extractor.extract_text_from_page(0, orientations=(0, 90))
-        print(text[:200] + "..." if len(text) > 200 else text)
-        print()
-        
-        # Layout mode extraction
-        print("4. Layout mode extraction:")
-        text = extractor.extract_text_from_page(0, extraction_mode="layout")
-        print(text[:200] + "..." if len(text) > 200 else text)
-        print()
-        
-        # Layout mode without vertical spacing
-        print("5. Layout mode without excess vertical whitespace:")
-        text = extractor.extract_text_from_page(
-            0, 
-            extraction_mode="layout",
-            layout_mode_space_vertically=False
-        )
-        print(text[:200] + "..." if len(text) > 200 else text)
-        print()
-        
-        # Layout mode with adjusted horizontal spacing
-        print("6. Layout mode with adjusted horizontal spacing:")
-        text = extractor.extract_text_from_page(
-            0,
-            extraction_mode="layout",
-            layout_mode_scale_weight=1.0
-        )
-        print(text[:200] + "..." if len(text) > 200 else text)
-        print()
-        
-        # Layout mode including rotated text
-        print("7. Layout mode including rotated text:")
-        text = extractor.extract_text_from_page(
-            0,
-            extraction_mode="layout",
-            layout_mode_strip_rotated=False
-        )
-        print(text[:200] + "..." if len(text) > 200 else text)
-        print()
-        
-        # Extract text from all pages
-        print("=== Extracting Text from All Pages ===")
-        all_pages = extractor.extract_text_all_pages()
-        for i, page_text in enumerate(all_pages):
-            print(f"Page {i+1} (first 100 chars): {page_text[:100]}...")
-        print()
-        
-        # Extract images from first page
-        print("=== Extracting Images from Page 0 ===")
-        images = extractor.extract_images_from_page(0, save_to_disk=False)
-        if images:
-            for i, img_info in enumerate(images):
-                print(f"Image {i+1}:")
-                print(f"  - Name: {img_info['name']}")
-                print(f"  - Format: {img_info['format']}")
-                print(f"  - Size: {img_info['size']}")
-                print(f"  - Data size: {len(img_info['data'])} bytes")
-                print(f"  - Base64 preview: {img_info['base64'][:50]}...")
-        else:
-            print("No images found on page 0")
-        print()
-        
-        # Extract combined content (text + images) from first page
-        print("=== Extracting Combined Content from Page 0 ===")
-        content = extractor.extract_content_from_page(0, include_images=True)
-        print(f"Page {content['page_number']}:")
-        print(f"Text (first 200 chars): {content['text'][:200]}...")
-        print(f"Number of images: {len(content['images'])}")
-        for i, img in enumerate(content['images']):
-            print(f"  Image {i+1}: {img['name']} ({img['format']}, {img['size']})")
-        print()
-        
-        # Extract all content from all pages
-        print("=== Extracting All Content from All Pages ===")
-        all_content = extractor.extract_content_all_pages(include_images=True)
-        for page_content in all_content:
-            page_num = page_content['page_number']
-            text_preview = page_content['text'][:100] if page_content['text'] else "No text"
-            image_count = len(page_content['images'])
-            print(f"Page {page_num+1}: {text_preview}... ({image_count} images)")
+        # Initialize extractor; it is closed when the examples finish
+        with PDFTextExtractor(pdf_file) as extractor:
+            # Get PDF info
+            print("PDF Info:")
+            info = extractor.get_pdf_info()
+            for key, value in info.items():
+                print(f"  {key}: {value}")
+            print()
+            
+            # Extract text from first page using different methods
+            print("=== Different Extraction Methods for Page 0 ===")
+            
+            # Basic extraction
+            print("1. Basic text extraction:")
+            text = extractor.extract_text_from_page(0)
+            print(text[:200] + "..." if len(text) > 200 else text)
+            print()
+            
+            # Extract only upward-oriented text
+            print("2. Extract only text oriented up:")
+            text = extractor.extract_text_from_page(0, orientations=0)
+            print(text[:200] + "..." if len(text) > 200 else text)
+            print()
+            
+            # Extract text oriented up and turned left
+            print("3. Extract text oriented up and turned left:")
+            text = extractor.extract_text_from_page(0, orientations=(0, 90))
+            print(text[:200] + "..." if len(text) > 200 else text)
+            print()
+            
+            # Layout mode extraction
+            print("4. Layout mode extraction:")
+            text = extractor.extract_text_from_page(0, extraction_mode="layout")
+            print(text[:200] + "..." if len(text) > 200 else text)
+            print()
+            
+            # Layout mode without vertical spacing
+            print("5. Layout mode without excess vertical whitespace:")
+            text = extractor.extract_text_from_page(
+                0, 
+                extraction_mode="layout",
+                layout_mode_space_vertically=False
+            )
+            print(text[:200] + "..." if len(text) > 200 else text)
+            print()
+            
+            # Layout mode with adjusted horizontal spacing
+            print("6. Layout mode with adjusted horizontal spacing:")
+            text = extractor.extract_text_from_page(
+                0,
+                extraction_mode="layout",
+                layout_mode_scale_weight=1.0
+            )
+            print(text[:200] + "..." if len(text) > 200 else text)
+            print()
+            
+            # Layout mode including rotated text
+            print("7. Layout mode including rotated text:")
+            text = extractor.extract_text_from_page(
+                0,
+                extraction_mode="layout",
+                layout_mode_strip_rotated=False
+            )
+            print(text[:200] + "..." if len(text) > 200 else text)
+            print()
+            
+            # Extract text from all pages
+            print("=== Extracting Text from All Pages ===")
+            all_pages = extractor.extract_text_all_pages()
+            for i, page_text in enumerate(all_pages):
+                print(f"Page {i+1} (first 100 chars): {page_text[:100]}...")
+            print()
+            
+            # Extract images from first page
+            print("=== Extracting Images from Page 0 ===")
+            images = extractor.extract_images_from_page(0, save_to_disk=False, include_base64=True)
+            if images:
+                for i, img_info in enumerate(images):
+                    print(f"Image {i+1}:")
+                    print(f"  - Name: {img_info['name']}")
+                    print(f"  - Format: {img_info['format']}")
+                    print(f"  - Size: {img_info['size']}")
+                    print(f"  - Data size: {len(img_info['data'])} bytes")
+                    print(f"  - Base64 preview: {img_info['base64'][:50]}...")
+            else:
+                print("No images found on page 0")
+            print()
+            
+            # Extract combined content (text + images) from first page
+            print("=== Extracting Combined Content from Page 0 ===")
+            content = extractor.extract_content_from_page(0, include_images=True)
+            print(f"Page {content['page_number']}:")
+            print(f"Text (first 200 chars): {content['text'][:200]}...")
+            print(f"Number of images: {len(content['images'])}")
+            for i, img in enumerate(content['images']):
+                print(f"  Image {i+1}: {img['name']} ({img['format']}, {img['size']})")
+            print()
+            
+            # Extract all content from all pages
+            print("=== Extracting All Content from All Pages ===")
+            all_content = extractor.extract_content_all_pages(include_images=True)
+            for page_content in all_content:
+                page_num = page_content['page_number']
+                text_preview = page_content['text'][:100] if page_content['text'] else "No text"
+                image_count = len(page_content['images'])
+                print(f"Page {page_num+1}: {text_preview}... ({image_count} images)")
         
     except FileNotFoundError:
         print(f"PDF file '{pdf_file}' not found. Please provide a valid PDF file path.")
@@ -658,6 +1253,19 @@ if __name__ == "__main__":
         print(f"Standalone function demo error: {str(e)}")
 
 
+def page_data_dir(data_dir: Path, content_id: str) -> Path:
+    """
+    Directory holding a document's per-page JSON shards, kept under its own
+    "pages" root so content IDs can't collide with other entries in data_dir
+    """
+    return data_dir / "pages" / content_id
+
+
+def page_data_path(data_dir: Path, content_id: str, page_number: int) -> Path:
+    """
+    Path of the per-page JSON shard written by process_pdf_file (page_number is 1-indexed)
+    """
+    return page_data_dir(data_dir, content_id) / f"page_{page_number}.json"
 
 
 def process_pdf_file(file_path: Path, content_id: str, image_dir: Path, data_dir: Path) -> Dict[str, Any]:
@@ -665,81 +1273,110 @@ def process_pdf_file(file_path: Path, content_id: str, image_dir: Path, data_dir
     Process PDF file and extract text and images page-wise
     """
     try:
-        # Initialize PDF extractor
-        extractor = PDFTextExtractor(str(file_path))
-        
-        # Get PDF info
-        pdf_info = extractor.get_pdf_info()
-        
-        # Extract content from all pages
-        all_content = extractor.extract_content_all_pages(
-            include_images=True,
-            save_images_to_disk=True,
-            output_dir=str(image_dir / content_id),
-            extraction_mode="layout"
-        )
-        
-        # Check total character count to avoid quota limits
-        total_characters = sum(len(str(page_content.get("text", ""))) for page_content in all_content)
-        if total_characters > 100000:  # 100k character limit
-            logger.warning(f"Document {content_id} exceeds character limit: {total_characters:,} characters")
-            raise ValueError(f"Document exceeds 100,000 character limit ({total_characters:,} characters). Please use a smaller document.")
-        
-        logger.info(f"Document {content_id} character count: {total_characters:,} characters (within limit)")
+        # Initialize PDF extractor; only the extraction passes need the PDF open
+        with PDFTextExtractor(str(file_path)) as extractor:
+            # Get PDF info
+            pdf_info = extractor.get_pdf_info()
+            
+            # Cheap text-only pass first, so documents over the character limit are
+            # rejected before any image is extracted or written to disk
+            pages_text = []
+            total_characters = 0
+            # This already runs in app.py's PDF_POOL worker, so pages are extracted
+            # in-process rather than through a nested pool per upload
+            text_pages = extractor.iter_text_all_pages(extraction_mode="layout", num_workers=1)
+            for text in text_pages:
+                text_length = len(text)
+                total_characters += text_length
+                # Check total character count to avoid quota limits, without extracting the remaining pages
+                if total_characters > 100000:  # 100k character limit
+                    text_pages.close()
+                    logger.warning(f"Document {content_id} exceeds character limit: {total_characters:,}+ characters")
+                    raise ValueError(f"Document exceeds 100,000 character limit ({total_characters:,}+ characters). Please use a smaller document.")
+                pages_text.append((text, text_length))
+            
+            # Within the limit, so extract images
+            page_images = extractor.extract_images_all_pages(
+                save_to_disk=True,
+                output_dir=str(image_dir / content_id),
+                include_sha256=True,
+                return_bytes=False,  # Images are on disk; only metadata is kept
+                num_workers=1
+            )
         
         # Process and organize the data
         processed_data = {
             "content_id": content_id,
             "pdf_info": pdf_info,
-            "total_pages": len(all_content),
+            "total_pages": len(pages_text),
             "processed_at": datetime.now().isoformat(),
-            "pages": []
+            "total_text_length": total_characters,
+            "total_images": 0,
+            "pages": [],
+            "pages_summary": []
         }
         
-        for page_content in all_content:
-            # Safely extract page number
-            page_num = page_content.get("page_number", 0)
-            if isinstance(page_num, (int, float)):
-                page_number = int(page_num) + 1
-            else:
-                page_number = 1  # Default fallback
+        for page_index, (text, text_length) in enumerate(pages_text):
+            page_number = page_index + 1
+            
+            # Process images for this page; extract_images_from_page always returns a list of dicts.
+            # Images are referenced by path and content hash, never embedded in the JSON.
+            # extract_images_from_page sets every key used here (file_path because
+            # images are saved to disk, sha256 because it is requested), so they are
+            # indexed directly
+            images = [
+                {
+                    "image_index": img_idx + 1,
+                    "image_name": img_info["name"],
+                    "image_format": img_info["format"],
+                    "image_size": img_info["size"],
+                    "image_path": img_info["file_path"],
+                    "sha256": img_info["sha256"]
+                }
+                for img_idx, img_info in enumerate(page_images.get(page_index, []))
+            ]
             
             page_data = {
                 "page_number": page_number,
-                "text": str(page_content.get("text", "")),
-                "text_length": len(str(page_content.get("text", ""))),
-                "images": []
+                "text": text,
+                "text_length": text_length,
+                "images": images
             }
+            page_data["text_preview"] = text[:100] + "..." if text_length > 100 else text
             
-            # Process images for this page
-            images_list = page_content.get("images", [])
-            if isinstance(images_list, list):
-                for img_idx, img_info in enumerate(images_list):
-                    if isinstance(img_info, dict):
-                        image_data = {
-                            "image_index": img_idx + 1,
-                            "image_name": img_info.get("name", f"image_{img_idx + 1}"),
-                            "image_format": img_info.get("format", "unknown"),
-                            "image_size": img_info.get("size", None),
-                            "image_path": img_info.get("file_path", ""),
-                            "base64_preview": (img_info.get("base64", "")[:100] + "..." 
-                                             if len(img_info.get("base64", "")) > 100 
-                                             else img_info.get("base64", ""))
-                        }
-                        page_data["images"].append(image_data)
-            
-            page_data["image_count"] = len(page_data["images"])
+            page_data["image_count"] = len(images)
             processed_data["pages"].append(page_data)
+            
+            # Keep document-level aggregates so summary reads don't walk every page
+            processed_data["total_images"] += page_data["image_count"]
+            processed_data["pages_summary"].append({
+                "page_number": page_number,
+                "text_length": page_data["text_length"],
+                "image_count": page_data["image_count"],
+                "text_preview": page_data["text_preview"]
+            })
+        
+        logger.info(f"Document {content_id} character count: {total_characters:,} characters (within limit)")
+        
+        # Save each page separately so single-page reads don't parse the whole document
+        page_data_dir(data_dir, content_id).mkdir(parents=True, exist_ok=True)
+        for page_data in processed_data["pages"]:
+            write_json_atomic(page_data_path(data_dir, content_id, page_data["page_number"]), page_data)
         
         # Save processed data as JSON
         json_file_path = data_dir / f"{content_id}.json"
-        with open(json_file_path, 'w', encoding='utf-8') as f:
-            json.dump(processed_data, f, indent=2, ensure_ascii=False)
+        write_json_atomic(json_file_path, processed_data, option=PROCESSED_JSON_OPTION)
         
-        logger.info(f"Processed PDF {content_id}: {len(all_content)} pages, saved to {json_file_path}")
+        logger.info(f"Processed PDF {content_id}: {processed_data['total_pages']} pages, saved to {json_file_path}")
         
         return processed_data
         
     except Exception as e:
         logger.error(f"Error processing PDF {content_id}: {str(e)}")
-        raise e
\ No newline at end of file
+        raise e
+
+
+if __name__ == "__main__":
+    # Only configure logging when run as a script; importers own their logging setup
+    logging.basicConfig(level=logging.INFO)
+    demo()  # Pass your PDF file path here
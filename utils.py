@@ -1,5 +1,43 @@
-import json
+import mmap
+import os
+import orjson
 import re
+import tempfile
+import unicodedata
+
+
+# Common Unicode characters and their ASCII equivalents, applied by
+# format_text in a single str.translate pass (accented letters are handled
+# by NFKD decomposition instead)
+_UNICODE_TRANSLATION = str.maketrans({
+    '\u2013': '-',  # en dash
+    '\u2014': '--', # em dash
+    '\u2018': "'",  # left single quotation mark
+    '\u2019': "'",  # right single quotation mark
+    '\u201c': '"',  # left double quotation mark
+    '\u201d': '"',  # right double quotation mark
+    '\u2022': '•',  # bullet point
+    '\u00a0': ' ',  # non-breaking space
+    '\u2026': '...', # horizontal ellipsis
+    '\u0142': 'l',  # ł (Polish l)
+    '\u0141': 'L',  # Ł (Polish L)
+    '\u2197': '^',  # up-right arrow (often used as superscript)
+    '\u2217': '*',  # asterisk operator
+    '\u2020': '+',  # dagger
+    '\u00b7': '·',  # middle dot
+})
+
+# Combining diacritical marks left behind by NFKD decomposition
+_COMBINING_MARKS = re.compile(r'[\u0300-\u036f]+')
+
+# Runs of spaces and/or non-ASCII characters; each run collapses to one space
+_NON_ASCII_OR_SPACES = re.compile(r'[^\x00-\x1f\x21-\x7f]+')
+
+# A line break and the whitespace around it (the same characters str.strip removes)
+_LINE_TRIM = re.compile(r'[^\S\n]*\n[^\S\n]*')
+
+# Three or more line breaks; run after _LINE_TRIM, so no whitespace sits between them
+_EXTRA_BLANK_LINES = re.compile(r'\n{3,}')
 
 
 def format_text(text):
@@ -16,66 +54,56 @@ def format_text(text):
         return text
     
     # Handle common escape sequences
-    text = text.replace('\\n', '\n')
-    text = text.replace('\\t', '\t')
-    text = text.replace('\\r', '\r')
-    
-    # Remove or replace problematic Unicode characters
-    # Replace common Unicode characters with their ASCII equivalents
-    unicode_replacements = {
-        '\u2013': '-',  # en dash
-        '\u2014': '--', # em dash
-        '\u2018': "'",  # left single quotation mark
-        '\u2019': "'",  # right single quotation mark
-        '\u201c': '"',  # left double quotation mark
-        '\u201d': '"',  # right double quotation mark
-        '\u2022': '•',  # bullet point
-        '\u00a0': ' ',  # non-breaking space
-        '\u2026': '...', # horizontal ellipsis
-        '\u00e9': 'e',  # é
-        '\u00ed': 'i',  # í
-        '\u00f3': 'o',  # ó
-        '\u00fa': 'u',  # ú
-        '\u00e1': 'a',  # á
-        '\u00c1': 'A',  # Á
-        '\u00c9': 'E',  # É
-        '\u00cd': 'I',  # Í
-        '\u00d3': 'O',  # Ó
-        '\u00da': 'U',  # Ú
-        '\u0142': 'l',  # ł (Polish l)
-        '\u2197': '^',  # up-right arrow (often used as superscript)
-        '\u2217': '*',  # asterisk operator
-        '\u2020': '+',  # dagger
-        '\u00b7': '·',  # middle dot
-    }
-    
-    for unicode_char, replacement in unicode_replacements.items():
-        text = text.replace(unicode_char, replacement)
+    if '\\' in text:
+        text = text.replace('\\n', '\n')
+        text = text.replace('\\t', '\t')
+        text = text.replace('\\r', '\r')
     
-    # Remove other problematic Unicode characters that can't be easily replaced
-    text = re.sub(r'[^\x00-\x7F]+', ' ', text)
+    # Already-ASCII text (most English pages) has nothing for the Unicode steps to do
+    is_ascii = text.isascii()
     
-    # Normalize whitespace
-    # Replace multiple spaces with single space
-    text = re.sub(r' +', ' ', text)
+    if not is_ascii:
+        # Replace common Unicode characters with their ASCII equivalents
+        text = text.translate(_UNICODE_TRANSLATION)
+        
+        # Decompose accented letters and drop the accents (é -> e, ñ -> n, ü -> u)
+        text = _COMBINING_MARKS.sub('', unicodedata.normalize('NFKD', text))
     
-    # Replace multiple newlines with double newlines (paragraph breaks)
-    text = re.sub(r'\n\s*\n\s*\n+', '\n\n', text)
+    # Replace other problematic Unicode characters that can't be easily replaced,
+    # and runs of spaces, with a single space in one pass
+    if not is_ascii or '  ' in text:
+        text = _NON_ASCII_OR_SPACES.sub(' ', text)
     
     # Clean up leading/trailing whitespace on each line
-    lines = text.split('\n')
-    cleaned_lines = [line.strip() for line in lines]
+    text = _LINE_TRIM.sub('\n', text)
     
-    # Remove empty lines at the beginning and end, but preserve paragraph breaks
-    while cleaned_lines and not cleaned_lines[0]:
-        cleaned_lines.pop(0)
-    while cleaned_lines and not cleaned_lines[-1]:
-        cleaned_lines.pop()
+    # Replace multiple newlines with double newlines (paragraph breaks),
+    # skipping the regex when a cheap substring check finds none
+    if '\n\n\n' in text:
+        text = _EXTRA_BLANK_LINES.sub('\n\n', text)
     
-    # Join lines back together
-    text = '\n'.join(cleaned_lines)
+    # Drop empty lines at the beginning and end while preserving paragraph breaks
+    return text.strip()
+
+
+def _load_json_mapped(json_data_path):
+    """
+    Parses a JSON file straight from a read-only memory map of it, rather than
+    reading it into a bytes copy first.
     
-    return text
+    Args:
+        json_data_path (str): Path to the JSON file.
+        
+    Returns:
+        The parsed JSON value.
+    """
+    with open(json_data_path, 'rb') as file:
+        # An empty file can't be mapped; parse it directly so callers get the
+        # usual JSONDecodeError
+        if os.fstat(file.fileno()).st_size == 0:
+            return orjson.loads(b"")
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped, memoryview(mapped) as view:
+            return orjson.loads(view)
 
 
 def topic_extractor_content(json_data_path):
@@ -88,12 +116,89 @@ def topic_extractor_content(json_data_path):
     Returns:
         dict: A dictionary containing 'total_pages' and 'pages_array' fields.
     """
-    with open(json_data_path, 'r') as file:
-        json_data = json.load(file)
+    json_data = _load_json_mapped(json_data_path)
     
     result = {
         'total_pages': json_data['total_pages'],
         'pages': [{'page_number': page['page_number'], 'text': format_text(page['text'])} for page in json_data['pages']]
     }
     
-    return result
\ No newline at end of file
+    return result
+
+
+def topic_extractor_stream(json_data_path):
+    """
+    Yields each page's number and cleaned text, one page at a time.
+    
+    Pages are read from the per-page JSON files process_pdf_file writes next to
+    the document JSON (pages/<content_id>/page_<n>.json), so only one page is
+    held in memory at once. Documents processed before those files
+    existed fall back to parsing the full JSON.
+    
+    Args:
+        json_data_path (str): Path to the JSON file containing the data.
+        
+    Yields:
+        tuple: (page_number, cleaned text) for each page, in page order.
+    """
+    data_dir, json_file_name = os.path.split(json_data_path)
+    page_dir = os.path.join(data_dir, "pages", os.path.splitext(json_file_name)[0])
+    if not os.path.isdir(page_dir):
+        for page in _load_json_mapped(json_data_path)['pages']:
+            yield page['page_number'], format_text(page['text'])
+        return
+    
+    page_number = 1
+    while True:
+        try:
+            with open(os.path.join(page_dir, f"page_{page_number}.json"), 'rb') as file:
+                page = orjson.loads(file.read())
+        except FileNotFoundError:
+            return
+        yield page['page_number'], format_text(page['text'])
+        page_number += 1
+
+
+def write_json_atomic(path, data, option=0):
+    """
+    Serializes data with orjson and atomically replaces the file at path with it.
+    
+    The bytes are written to a unique sibling temp file in a single unbuffered write and
+    renamed over the target, so readers never observe a partially written file.
+    No fsync is done; the data files are derived and can be regenerated.
+    
+    Args:
+        path (str or Path): Destination JSON file.
+        data: JSON-serializable object.
+        option (int): orjson option flags (e.g. orjson.OPT_INDENT_2).
+    """
+    # A unique temp name per write, so concurrent writers don't share one; it
+    # is removed if serializing, writing or the rename fails
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".",
+                                    prefix=f"{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        try:
+            os.fchmod(fd, 0o644)  # mkstemp creates the file owner-only
+            write_all(fd, orjson.dumps(data, option=option))
+        finally:
+            os.close(fd)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def write_all(fd, data):
+    """
+    Writes all of data to a raw file descriptor, retrying on short writes.
+    
+    Args:
+        fd (int): File descriptor opened for writing.
+        data (bytes): Bytes to write.
+    """
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
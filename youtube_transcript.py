@@ -1,5 +1,6 @@
 from youtube_transcript_api import YouTubeTranscriptApi
 import re
+from operator import attrgetter
 
 YOUTUBE_REGEX = re.compile(
     r"(?:youtu\.be/|youtube\.com/(?:watch\?v=|embed/|v/))"
@@ -10,17 +11,22 @@ def extract_youtube_transcript(url: str) -> str | None:
     """
     Uses regex to extract the 11-character YouTube video ID.
     """
+    # Cheap substring check before running the regex on non-YouTube URLs
+    if "youtu" not in url:
+        return ""
+
     m = YOUTUBE_REGEX.search(url)
     v_id = m.group("id") if m else None
 
+    final_transcript = ""
+
     if v_id:
         ytt_api = YouTubeTranscriptApi()
         fetched_transcript = ytt_api.fetch(v_id)
 
-        final_transcript = ""
-
         if fetched_transcript:
-            # is iterable
-            for snippet in fetched_transcript:
-                final_transcript += " " + snippet.text
+            # is iterable; join once instead of growing the string per snippet
+            parts = list(map(attrgetter("text"), fetched_transcript))
+            if parts:
+                final_transcript = " " + " ".join(parts)
     return final_transcript